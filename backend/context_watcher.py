@@ -1,7 +1,7 @@
 import redis
 import time
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 # Configure logging
 logging.basicConfig(
@@ -33,11 +33,11 @@ class ContextWatcher:
             host=redis_host,
             port=redis_port,
             db=redis_db,
-            decode_responses=True
+            decode_responses=False  # entries are parsed straight from bytes
         )
         self.poll_interval = poll_interval
         self.critical_threshold = critical_threshold
-        self.stream_positions: Dict[str, str] = {}  # Track last read position for each stream
+        self.stream_positions: Dict[bytes, bytes] = {}  # Track last read position for each stream
         self.running = False
         
     def start(self):
@@ -65,8 +65,8 @@ class ContextWatcher:
     def _process_all_streams(self):
         """Process all context streams in Redis"""
         try:
-            # Get all stream keys matching the pattern
-            stream_keys = self.redis_client.keys("context:*")
+            # Get all stream keys from the index maintained by the memory API
+            stream_keys = self.redis_client.smembers("context_streams")
             
             if not stream_keys:
                 return
@@ -79,7 +79,7 @@ class ContextWatcher:
         except Exception as e:
             logger.error(f"Unexpected error while processing streams: {str(e)}")
     
-    def _process_stream(self, stream_key: str):
+    def _process_stream(self, stream_key: bytes):
         """
         Process a single context stream
         
@@ -96,35 +96,59 @@ class ContextWatcher:
             if not entries:
                 return
                 
+            # Queue handover flags on a pipeline so a batch costs one round-trip
+            pipe = self.redis_client.pipeline(transaction=False)
+            handover_keys: List[str] = []
+            last_entry_id = None
+            
             # Process each entry
             for stream_name, stream_entries in entries:
                 for entry_id, data in stream_entries:
-                    self._process_entry(entry_id, data)
-                    
-                    # Update the last processed position
-                    self.stream_positions[stream_key] = entry_id
+                    handover_key = self._process_entry(entry_id, data, pipe)
+                    if handover_key:
+                        handover_keys.append(handover_key)
+                    last_entry_id = entry_id
+            
+            pipe.execute()
+            
+            for handover_key in handover_keys:
+                logger.info(f"Set handover flag: {handover_key} = true")
+            
+            # Only advance past the batch once its flags are written, so a
+            # failed execute() is retried on the next poll
+            self.stream_positions[stream_key] = last_entry_id
         
         except redis.RedisError as e:
-            logger.error(f"Redis error while processing stream {stream_key}: {str(e)}")
+            logger.error(f"Redis error while processing stream {stream_key.decode()}: {str(e)}")
     
-    def _process_entry(self, entry_id: str, data: Dict[str, str]):
+    def _process_entry(
+        self,
+        entry_id: bytes,
+        data: Dict[bytes, bytes],
+        pipe: redis.client.Pipeline
+    ) -> Optional[str]:
         """
-        Process a single stream entry and set handover flag if needed
+        Process a single stream entry and queue a handover flag if needed
         
         Args:
             entry_id: Redis stream entry ID
             data: Entry data containing task_id, token_count, max_tokens, etc.
+            pipe: Pipeline the handover flag is queued on; executed by the caller
+            
+        Returns:
+            The queued handover key, or None if no flag was queued
         """
         try:
-            task_id = data.get('task_id')
+            task_id = data.get(b'task_id')
             
             if not task_id:
-                logger.warning(f"Entry {entry_id} missing task_id, skipping")
-                return
+                logger.warning(f"Entry {entry_id.decode()} missing task_id, skipping")
+                return None
+            task_id = task_id.decode()
                 
-            # Get token counts
-            token_count = int(data.get('token_count', 0))
-            max_tokens = int(data.get('max_tokens', 1))  # Default to 1 to avoid division by zero
+            # Get token counts (int() parses the raw bytes directly)
+            token_count = int(data.get(b'token_count', 0))
+            max_tokens = int(data.get(b'max_tokens', 1))  # Default to 1 to avoid division by zero
             
             # Calculate usage ratio
             usage_ratio = token_count / max_tokens
@@ -137,17 +161,17 @@ class ContextWatcher:
                     f"({usage_ratio:.1%})"
                 )
                 
-                # Set the handover required flag in Redis
+                # Queue the handover required flag; the caller sends the batch
                 handover_key = f"handover_required:{task_id}"
-                self.redis_client.set(handover_key, "true")
-                logger.info(f"Set handover flag: {handover_key} = true")
+                pipe.set(handover_key, "true")
+                return handover_key
             
         except (ValueError, TypeError) as e:
-            logger.error(f"Error parsing data for entry {entry_id}: {str(e)}")
-        except redis.RedisError as e:
-            logger.error(f"Redis error while setting handover flag: {str(e)}")
+            logger.error(f"Error parsing data for entry {entry_id.decode()}: {str(e)}")
         except Exception as e:
-            logger.error(f"Unexpected error processing entry {entry_id}: {str(e)}")
+            logger.error(f"Unexpected error processing entry {entry_id.decode()}: {str(e)}")
+        
+        return None
 
 
 if __name__ == "__main__":
@@ -1,13 +1,47 @@
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+import os
 import redis
-import json
+from redis.asyncio import BlockingConnectionPool, Redis
+import orjson
 import time
-from typing import Dict, Any, Optional
+import uvicorn
+from typing import AsyncIterator, Dict, Any, Optional
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
 
-app = FastAPI()
 
 # Redis connection
-redis_client = redis.Redis(host="redis", port=6379, db=0, decode_responses=True)
+# REDIS_POOL_MAX caps connections per worker. When every connection is in
+# use, further requests wait up to REDIS_POOL_TIMEOUT seconds for one
+REDIS_POOL_MAX = int(os.getenv("REDIS_POOL_MAX", "100"))
+redis_pool = BlockingConnectionPool(
+    host="redis",
+    port=6379,
+    db=0,
+    max_connections=REDIS_POOL_MAX,
+    timeout=float(os.getenv("REDIS_POOL_TIMEOUT", "20")),
+    socket_keepalive=True,
+    health_check_interval=30,
+    decode_responses=True
+)
+redis_client = Redis(connection_pool=redis_pool)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Release pooled Redis connections when the app shuts down"""
+    yield
+    await redis_pool.disconnect()
+
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 @app.post("/context-ping")
 async def context_ping(request: Request) -> Dict[str, Any]:
@@ -21,9 +55,10 @@ async def context_ping(request: Request) -> Dict[str, Any]:
     - timestamp: Time of the ping (optional, will use server time if not provided)
     
     Writes data to Redis stream with key format: context:{project_id}
+    and adds the stream key to the context_streams set
     """
     try:
-        data = await request.json()
+        data = orjson.loads(await request.body())
         
         # Validate required fields
         required_fields = ["task_id", "token_count", "max_tokens"]
@@ -48,9 +83,13 @@ async def context_ping(request: Request) -> Dict[str, Any]:
             "usage_percentage": str(round((data["token_count"] / data["max_tokens"]) * 100, 2))
         }
         
-        # Write to Redis stream
+        # Write to Redis stream and record the stream in the index the
+        # context watcher reads instead of scanning the keyspace
         stream_key = f"context:{project_id}"
-        entry_id = redis_client.xadd(stream_key, stream_data)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.xadd(stream_key, stream_data)
+            pipe.sadd("context_streams", stream_key)
+            entry_id, _ = await pipe.execute()
         
         return {
             "status": "success",
@@ -61,7 +100,7 @@ async def context_ping(request: Request) -> Dict[str, Any]:
         
     except redis.RedisError as e:
         raise HTTPException(status_code=500, detail=f"Redis error: {str(e)}")
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
@@ -71,3 +110,20 @@ async def context_ping(request: Request) -> Dict[str, Any]:
 async def health_check() -> Dict[str, str]:
     """Simple health check endpoint to verify API is running"""
     return {"status": "healthy"}
+
+
+if __name__ == "__main__":
+    # uvloop and httptools come with uvicorn[standard]. Behind gunicorn, use
+    # "-k uvicorn.workers.UvicornWorker" with the same settings.
+    # limit_concurrency counts open sockets, including idle keep-alives, so it
+    # sits well above REDIS_POOL_MAX; the blocking pool queues Redis calls.
+    uvicorn.run(
+        "memory_api:app",
+        host="0.0.0.0",
+        port=8080,
+        loop="uvloop",
+        http="httptools",
+        workers=os.cpu_count(),
+        limit_concurrency=1000,
+        timeout_keep_alive=30
+    )